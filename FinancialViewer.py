@@ -1,10 +1,24 @@
+import asyncio
 import datetime
+import hashlib
+import json
+import math
+import mmap
+import multiprocessing
 import os
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
 import pandas as pd
 import numpy as np
 import tkinter as tk
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox
 from bokeh.palettes import Category20_20
@@ -12,6 +26,528 @@ from bokeh.palettes import Category20_20
 __author__: 'Brandon Dos Remedios | git: @bdosremedios'
 
 
+class FXRateTable():
+    """ Daily exchange rates of currencies, each given as the value of one
+    unit of the currency in a common quote currency, for converting account
+    changes between currencies.
+
+    Attributes
+    ---
+    quote_currency : str
+        Currency all rates are given in.
+    rate_dates : numpy.ndarray of numpy.datetime64
+        Sorted days rates are given on.
+    currency_rates : dict of str to numpy.ndarray
+        Rate of each currency on each day of rate_dates.
+
+    """
+    def __init__(self, rate_dates, currency_rates, quote_currency):
+        """ Sorts daily rates by date for as-of lookup.
+
+        Parameters
+        ---
+        rate_dates : list of datetime.datetime
+            Days rates are given on.
+        currency_rates : dict of str to list of float
+            Value of one unit of each currency in quote currency, on each
+            day of rate_dates.
+        quote_currency : str
+            Currency all rates are given in.
+
+        """
+        rate_dates = np.array(rate_dates, dtype='datetime64[D]')
+        date_order = np.argsort(rate_dates, kind='stable')
+
+        self.quote_currency = quote_currency
+        self.rate_dates = rate_dates[date_order]
+        self.currency_rates = {
+            currency: np.asarray(rates, dtype=float)[date_order]
+            for currency, rates in currency_rates.items()
+        }
+        self.currency_rates[quote_currency] = np.ones(len(rate_dates))
+
+    @classmethod
+    def from_csv(cls, fx_csv, quote_currency):
+        """ Loads rates from csv with a row for each date, currency, and
+        value of one unit of currency in quote currency.
+
+        Parameters
+        ---
+        fx_csv : str
+            Path to csv of daily rates, with dates in the same format as the
+            transaction history csvs.
+        quote_currency : str
+            Currency all rates are given in.
+
+        Returns
+        ---
+        fx_rates : FXRateTable
+            Table of rates in csv.
+
+        """
+        rates_csv = pd.read_csv(fx_csv, header=None,
+                                names=['date', 'currency', 'rate'])
+        rates_csv['date'] = pd.to_datetime(rates_csv['date'],
+                                           format='%m/%d/%Y')
+        rates_table = rates_csv.pivot(index='date', columns='currency',
+                                      values='rate').sort_index().ffill()
+
+        return(cls(list(rates_table.index),
+                   {currency: list(rates_table[currency])
+                    for currency in rates_table.columns},
+                   quote_currency))
+
+    def get_rates_asof(self, days, currency):
+        """ Grab rate of currency on or most recently before each day.
+
+        Parameters
+        ---
+        days : array_like of datetime.datetime or numpy.datetime64
+            Days to grab rates for.
+        currency : str
+            Currency to grab rates of.
+
+        Returns
+        ---
+        rates : numpy.ndarray
+            Value of one unit of currency in quote currency on each day.
+
+        """
+        if currency not in self.currency_rates:
+            raise ValueError('No {} rates.'.format(currency))
+        days = np.asarray(days, dtype='datetime64[D]')
+        rate_indices = np.searchsorted(self.rate_dates, days,
+                                       side='right') - 1
+        rates = self.currency_rates[currency][np.maximum(rate_indices, 0)]
+
+        # Days before table starts, or before currency's first rate in a
+        # table with other currencies starting earlier, have no rate
+        missing_rates = (rate_indices < 0) | np.isnan(rates)
+        if np.any(missing_rates):
+            raise ValueError(
+                'No {} rate on or before {}.'.format(
+                    currency, days[missing_rates][0]))
+
+        return(rates)
+
+    def convert(self, days, amounts, from_currency, to_currency):
+        """ Convert amounts on each day between currencies, using the rates
+        as of each day.
+
+        Parameters
+        ---
+        days : array_like of datetime.datetime or numpy.datetime64
+            Day of each amount.
+        amounts : array_like of float
+            Amounts in from_currency.
+        from_currency : str
+            Currency of amounts.
+        to_currency : str
+            Currency to convert amounts to.
+
+        Returns
+        ---
+        converted_amounts : numpy.ndarray
+            Amounts in to_currency.
+
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if from_currency == to_currency:
+            return(amounts)
+
+        return(amounts * self.get_rates_asof(days, from_currency) /
+               self.get_rates_asof(days, to_currency))
+
+
+class SparseAccountSeries():
+    """ History of an account stored only on days with changes, with the
+    balance after each of those days as a run-length segment lasting until
+    the next day with changes. Dense daily views are built on request for
+    just the range asked for.
+
+    Attributes
+    ---
+    change_days : numpy.ndarray of numpy.datetime64
+        Sorted days with account changes.
+    daily_changes : numpy.ndarray of float
+        Total account change on each of change_days.
+    balances : numpy.ndarray of float
+        Balance from each of change_days until the next, rounded to the
+        cent.
+    initial_balance : float
+        Balance before first of change_days.
+    first_day : datetime.datetime
+        First day of account history.
+    last_day : datetime.datetime
+        Last day of account history.
+
+    """
+    def __init__(self, change_days, daily_changes, initial_balance,
+                 first_day=None, last_day=None):
+        """ Converts changes on days into balance segments.
+
+        Parameters
+        ---
+        change_days : list of datetime.datetime
+            Days with account changes, in increasing time order.
+        daily_changes : list of float
+            Total account change on each day.
+        initial_balance : float
+            Balance before first day of changes.
+        first_day : datetime.datetime or None
+            First day of history if there are no change days, in which case
+            balance is initial_balance throughout.
+        last_day : datetime.datetime or None
+            Last day of history if there are no change days.
+
+        """
+        self.change_days = np.array(change_days, dtype='datetime64[D]')
+        self.daily_changes = np.array(daily_changes, dtype=float)
+        self.initial_balance = initial_balance
+        self.balances = np.round(
+            initial_balance + np.cumsum(self.daily_changes), 2)
+        if change_days:
+            self.first_day = change_days[0]
+            self.last_day = change_days[-1]
+        else:
+            self.first_day = first_day
+            self.last_day = last_day
+
+    def shift_balances(self, offset):
+        """ Shift initial balance, and so every balance, by an amount.
+
+        Parameters
+        ---
+        offset : float
+            Amount to shift balances by.
+
+        """
+        self.initial_balance += offset
+        self.balances = np.round(
+            self.initial_balance + np.cumsum(self.daily_changes), 2)
+
+    def get_balances_on(self, days):
+        """ Grab balance at end of each day, from segment containing day.
+
+        Parameters
+        ---
+        days : array_like of datetime.datetime or numpy.datetime64
+            Days to grab balances on.
+
+        Returns
+        ---
+        balances_on_days : numpy.ndarray of float
+            Balance on each day, initial balance if before history.
+
+        """
+        segment_indices = np.searchsorted(
+            self.change_days, np.asarray(days, dtype='datetime64[D]'),
+            side='right') - 1
+        if len(self.balances) == 0:
+            return(np.full(len(segment_indices),
+                           round(self.initial_balance, 2)))
+        balances_on_days = self.balances[np.maximum(segment_indices, 0)]
+
+        return(np.where(segment_indices < 0, self.initial_balance,
+                        balances_on_days))
+
+    def get_first_balance(self):
+        """ Balance on first day of history, after changes that day. """
+        return(float(self.get_balances_on([self.first_day])[0]))
+
+    def get_final_balance(self):
+        """ Balance on last day of history. """
+        return(float(self.get_balances_on([self.last_day])[0]))
+
+    def get_daily_view(self, start_date=None, end_date=None):
+        """ Build dense daily days, changes, and balances, with a 0. value
+        change on days with no changes, over a range of history.
+
+        Parameters
+        ---
+        start_date : datetime.datetime or None
+            First day of view, first day of history if None or earlier.
+        end_date : datetime.datetime or None
+            Last day of view, last day of history if None or later.
+
+        Returns
+        ---
+        days : list of datetime.datetime
+            Every day in range.
+        changes : list of float
+            Total account change on each day.
+        balances : list of float
+            Balance on each day.
+
+        """
+        first_day = np.datetime64(self.first_day, 'D')
+        last_day = np.datetime64(self.last_day, 'D')
+        if start_date is not None:
+            first_day = max(first_day, np.datetime64(start_date, 'D'))
+        if end_date is not None:
+            last_day = min(last_day, np.datetime64(end_date, 'D'))
+        if first_day > last_day:
+            return([], [], [])
+
+        days = np.arange(first_day, last_day + 1)
+
+        # Scatter changes within range onto their days
+        in_range = ((self.change_days >= first_day) &
+                    (self.change_days <= last_day))
+        changes = np.zeros(len(days))
+        changes[(self.change_days[in_range] - first_day).astype(int)] = \
+            self.daily_changes[in_range]
+
+        return(list(days.astype('datetime64[us]').astype(datetime.datetime)),
+               changes.tolist(),
+               self.get_balances_on(days).tolist())
+
+    def get_monthly_change_balance(self):
+        """ Collapse changes and balances into monthly account changes and
+        balances, for every month from first to last day of history.
+
+        Returns
+        ---
+        months : list of datetime.datetime
+            First of each month of history.
+        monthly_account_changes : list of float
+            Total account change on each month.
+        monthly_account_balances : list of float
+            Balance at start of each month (after changes on first day of
+            month). Balance on first day of history if history starts after
+            first of month.
+
+        """
+        months = []
+        current_month = datetime.datetime(
+            day=1, month=self.first_day.month, year=self.first_day.year)
+        while current_month <= self.last_day:
+            months.append(current_month)
+            year, month = divmod(current_month.month, 12)
+            current_month = datetime.datetime(
+                day=1, month=month + 1, year=current_month.year + year)
+
+        # Sum changes on days of each month, only visiting days with changes
+        month_indices = {month: i for i, month in enumerate(months)}
+        changes_on_months = [[] for month in months]
+        for day, change in zip(
+                self.change_days.astype('datetime64[us]').astype(
+                    datetime.datetime),
+                self.daily_changes.tolist()):
+            changes_on_months[month_indices[datetime.datetime(
+                day=1, month=day.month, year=day.year)]].append(change)
+        monthly_account_changes = [
+            round(sum(changes, 0.), 2) for changes in changes_on_months]
+
+        monthly_account_balances = self.get_balances_on(
+            [max(month, self.first_day) for month in months]).tolist()
+
+        return(months, monthly_account_changes, monthly_account_balances)
+
+
+class QuantileSketch():
+    """ Mergeable streaming sketch of a distribution of values, following
+    KLL (Karnin, Lang, and Liberty, 2016), for estimating quantiles and
+    histograms without keeping every value.
+
+    Values are kept in levels of compactors, with each value kept in level h
+    standing for 2**h values. When a level grows past its capacity it is
+    sorted and every other value, starting at a random offset, is promoted
+    to the next level up. Capacities shrink geometrically by 2/3 going down
+    from the top level, so memory is O(k log(count/k)). Estimated ranks, so
+    quantiles, are within roughly 2.5/k of count of the true rank with high
+    probability, about 1.25% of count at the default k of 200. Histogram
+    counts are differences of two ranks so within twice that. Minimum and
+    maximum are exact.
+
+    Attributes
+    ---
+    k : int
+        Capacity of top level, trading memory for accuracy.
+    compactors : list of list of float
+        Values kept in each level.
+    count : int
+        Number of values added.
+    min_value : float
+        Smallest value added.
+    max_value : float
+        Largest value added.
+
+    """
+    def __init__(self, k=200, seed=None):
+        """ Creates empty sketch.
+
+        Parameters
+        ---
+        k : int
+            Capacity of top level.
+        seed : int or None
+            Seed for random offsets of compactions, for reproducible sketches.
+
+        """
+        self.k = k
+        self.compactors = [[]]
+        self.count = 0
+        self.min_value = math.inf
+        self.max_value = -math.inf
+        self.rng = random.Random(seed)
+
+    def get_capacity(self, level):
+        """ Number of values level can keep before being compacted. """
+        depth = len(self.compactors) - 1 - level
+        return(max(2, int(math.ceil(self.k * (2/3)**depth))))
+
+    def add(self, value):
+        """ Add one value to sketch, compacting only when the bottom level
+        is past its capacity.
+
+        Parameters
+        ---
+        value : float
+            Value to add.
+
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self.min_value = min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+        if len(self.compactors[0]) > self.get_capacity(0):
+            self.compress()
+
+    def update(self, values):
+        """ Add values to sketch.
+
+        Parameters
+        ---
+        values : iterable of float
+            Values to add.
+
+        """
+        values = list(values)
+        if not values:
+            return
+        self.compactors[0].extend(values)
+        self.count += len(values)
+        self.min_value = min(self.min_value, min(values))
+        self.max_value = max(self.max_value, max(values))
+        self.compress()
+
+    def merge(self, other):
+        """ Add values of another sketch to this one, level by level.
+
+        Parameters
+        ---
+        other : QuantileSketch
+            Sketch to merge in, left unchanged.
+
+        Returns
+        ---
+        self : QuantileSketch
+            This sketch, for chaining merges.
+
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for compactor, other_compactor in zip(self.compactors,
+                                              other.compactors):
+            compactor.extend(other_compactor)
+        self.count += other.count
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        self.compress()
+
+        return(self)
+
+    def compress(self):
+        """ Compact levels past their capacity, from the bottom up, until
+        every level fits.
+
+        """
+        level = 0
+        while level < len(self.compactors):
+            compactor = self.compactors[level]
+            if len(compactor) > self.get_capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+
+                # Promote every other sorted value, holding one back if odd
+                # so total weight is kept
+                compactor.sort()
+                held_back = [compactor.pop()] if len(compactor) % 2 else []
+                offset = self.rng.randint(0, 1)
+                self.compactors[level + 1].extend(compactor[offset::2])
+                self.compactors[level] = held_back
+            level += 1
+
+    def get_weighted_values(self):
+        """ Sorted values kept, with the number of values each stands for.
+
+        Returns
+        ---
+        values : numpy.ndarray of float
+            Values kept in all levels, sorted.
+        cumulative_weights : numpy.ndarray of int
+            Number of values added estimated to be at most each value.
+
+        """
+        values = np.concatenate(
+            [np.array(compactor, dtype=float)
+             for compactor in self.compactors])
+        weights = np.concatenate(
+            [np.full(len(compactor), 2**level)
+             for level, compactor in enumerate(self.compactors)])
+        value_order = np.argsort(values, kind='stable')
+
+        return(values[value_order], np.cumsum(weights[value_order]))
+
+    def get_quantile(self, fraction):
+        """ Estimate value below which a fraction of values fall.
+
+        Parameters
+        ---
+        fraction : float
+            Fraction of values, between 0 and 1.
+
+        Returns
+        ---
+        quantile : float
+            Estimated quantile, nan if sketch is empty.
+
+        """
+        if self.count == 0:
+            return(math.nan)
+        if fraction <= 0:
+            return(self.min_value)
+        if fraction >= 1:
+            return(self.max_value)
+        values, cumulative_weights = self.get_weighted_values()
+        quantile_index = np.searchsorted(cumulative_weights,
+                                         fraction*self.count)
+
+        return(float(values[min(quantile_index, len(values) - 1)]))
+
+    def get_histogram(self, bin_edges):
+        """ Estimate number of values in each bin.
+
+        Parameters
+        ---
+        bin_edges : list of float
+            Increasing edges of bins, with values in [edge, next edge).
+
+        Returns
+        ---
+        bin_counts : list of int
+            Estimated number of values in each bin.
+
+        """
+        values, cumulative_weights = self.get_weighted_values()
+        cumulative_weights = np.concatenate(([0], cumulative_weights))
+        counts_below_edges = cumulative_weights[
+            np.searchsorted(values, bin_edges, side='left')]
+
+        return(np.diff(counts_below_edges).tolist())
+
+
 class BankingHistory():
     """ Object containing calculated history of banking account with seperated
     chequing, saving, and total banking, and method for generating a summary
@@ -61,10 +597,19 @@ class BankingHistory():
         List of tuples of months and changes to banking account on month.
     bank_initial_monthly_balances : list of tuple(datetime.datetime, float)
         List of tuples of months and changes to banking account on month.
+    cheq_series : SparseAccountSeries
+        Chequing account changes and balances on days with changes, which
+        the daily lists are built from on first access.
+    save_series : SparseAccountSeries
+        Saving account changes and balances on days with changes.
+    bank_series : SparseAccountSeries
+        Banking account changes and balances on days with changes.
 
     """
     def __init__(self, initial_chequing, initial_saving, chequing_csv,
-                 saving_csv):
+                 saving_csv, chequing_currency=None, saving_currency=None,
+                 bank_currency=None, fx_rates=None, transfer_day_tolerance=3,
+                 start_date=None, end_date=None):
         """ Carries out calculation of banking history, for daily and monthly
         increments, for chequing, saving, and banking accounts.
 
@@ -78,20 +623,64 @@ class BankingHistory():
             Path to csv of transactions to and from chequing account.
         saving_csv : str
             Path to csv of transactions to and from saving account.
+        chequing_currency : str or None
+            Currency of chequing account.
+        saving_currency : str or None
+            Currency of saving account, same as chequing if None.
+        bank_currency : str or None
+            Currency of combined banking account, same as chequing if None.
+        fx_rates : FXRateTable or None
+            Daily exchange rates, needed if account currencies differ.
+        transfer_day_tolerance : int
+            Maximum number of days between the two legs of a transfer
+            between chequing and saving accounts.
+        start_date : datetime.datetime or None
+            First day of history to load, first day in csvs if None.
+        end_date : datetime.datetime or None
+            Last day of history to load, last day in csvs if None.
 
         """
         # Initial balance for both accounts on first day of transaction
         # history (balance listed alongside that first day after changes)
         self.initial_cheq_balance = initial_chequing
         self.initial_save_balance = initial_saving
+        self.entered_initial_balances = (initial_chequing, initial_saving)
+
+        # Currency of each account, with changes converted to the banking
+        # currency before being combined, cached per account and currency.
+        # Other currencies default to chequing so it must be given with them
+        if chequing_currency is None and (saving_currency is not None or
+                                          bank_currency is not None):
+            raise ValueError('Chequing currency must be given along with '
+                             'saving or banking currency.')
+        self.cheq_currency = chequing_currency
+        self.save_currency = (chequing_currency if saving_currency is None
+                              else saving_currency)
+        self.bank_currency = (chequing_currency if bank_currency is None
+                              else bank_currency)
+        self.fx_rates = fx_rates
+        self.converted_daily_changes = {}
         
-        # Load transaction history for each account
-        chequing_csvs = pd.read_csv(chequing_csv)
-        chequing_csvs = list(zip(list(chequing_csvs.iloc[:, 0]),
-                                 list(chequing_csvs.iloc[:, 1])))
-        saving_csvs = pd.read_csv(saving_csv)
-        saving_csvs = list(zip(list(saving_csvs.iloc[:, 0]),
-                               list(saving_csvs.iloc[:, 1])))
+        # Load transaction history for each account, only scanning the
+        # window of dates asked for if given
+        date_window = start_date is not None or end_date is not None
+        if (start_date is not None and end_date is not None and
+                start_date > end_date):
+            raise ValueError('Start date {} is after end date {}.'.format(
+                start_date.strftime('%m/%d/%Y'),
+                end_date.strftime('%m/%d/%Y')))
+        if date_window:
+            chequing_csvs = self.load_transaction_window(
+                chequing_csv, start_date, end_date)
+            saving_csvs = self.load_transaction_window(
+                saving_csv, start_date, end_date)
+        else:
+            chequing_csvs = pd.read_csv(chequing_csv)
+            chequing_csvs = list(zip(list(chequing_csvs.iloc[:, 0]),
+                                     list(chequing_csvs.iloc[:, 1])))
+            saving_csvs = pd.read_csv(saving_csv)
+            saving_csvs = list(zip(list(saving_csvs.iloc[:, 0]),
+                                   list(saving_csvs.iloc[:, 1])))
 
         # Extract dates, and account changes on those dates
         cheq_days, cheq_changes = self.extract_datetime_accountchange(
@@ -99,6 +688,40 @@ class BankingHistory():
         save_days, save_changes = self.extract_datetime_accountchange(
                 saving_csvs)
 
+        # Keep each transaction, flagging those that are one leg of a
+        # transfer between chequing and saving so flows can exclude them.
+        # Legs in different currencies will not have equal amounts, so are
+        # only matched if accounts share a currency
+        self.cheq_transaction_days = cheq_days
+        self.cheq_transaction_changes = cheq_changes
+        self.save_transaction_days = save_days
+        self.save_transaction_changes = save_changes
+        if self.cheq_currency == self.save_currency:
+            self.cheq_transfer_flags, self.save_transfer_flags = \
+                self.match_transfers(cheq_days, cheq_changes, save_days,
+                                     save_changes, transfer_day_tolerance)
+        else:
+            self.cheq_transfer_flags = [False]*len(cheq_changes)
+            self.save_transfer_flags = [False]*len(save_changes)
+
+        # Sketch distribution of transaction sizes in banking currency for
+        # each account and month, adding each size as it is converted.
+        # Transactions are kept for transfer matching and monthly flows, but
+        # merging a few small sketches over a range of months is cheaper
+        # than gathering and sorting every size in it on each request
+        self.transaction_size_sketches = {}
+        for account in ('cheq', 'save'):
+            for date, change in zip(
+                    getattr(self, account + '_transaction_days'),
+                    self.convert_transaction_changes(account)):
+                month = datetime.datetime(day=1, month=date.month,
+                                          year=date.year)
+                sketch = self.transaction_size_sketches.get((account, month))
+                if sketch is None:
+                    sketch = QuantileSketch()
+                    self.transaction_size_sketches[(account, month)] = sketch
+                sketch.add(abs(change))
+
         # Collapse dates and changes to a total account change on each date
         cheq_unique_days, cheq_daily_changes = self.collapse_date_change(
                 cheq_days, cheq_changes)
@@ -111,60 +734,51 @@ class BankingHistory():
         save_unique_days.reverse()
         save_daily_changes.reverse()
 
-        # Fill in days with no account changes with a 0. value account change,
-        # So that future plotting and statistics have a more consistent daily
-        # time interval to evaluate by
-        cheq_fill_days, cheq_fill_daily_changes = self.fill_no_transact_days(
-                cheq_unique_days, cheq_daily_changes)
-        save_fill_days, save_fill_daily_changes = self.fill_no_transact_days(
-                save_unique_days, save_daily_changes)
-
-        # Correct balances, by subtracting first day total change, so that
-        # balances are of changes immediately previous to change history
-        self.initial_cheq_balance -= cheq_daily_changes[0]
-        self.initial_save_balance -= save_daily_changes[0]
-
-        # Convert daily changes into a daily balance
-        cheq_daily_balances = self.convert_changes_to_balances(
-                self.initial_cheq_balance, cheq_fill_daily_changes)
-        save_daily_balances = self.convert_changes_to_balances(
-                self.initial_save_balance, save_fill_daily_changes)
-
-        # Define object attributes for chequing account info
-        self.cheq_days = cheq_fill_days
-        self.cheq_daily_changes = cheq_fill_daily_changes
-        self.cheq_daily_balances = cheq_daily_balances
-
-        # Grab chequing account info per month from per day
-        cheq_months, cheq_monthly_changes, cheq_monthly_balances = \
-            self.get_monthly_change_balance(self.cheq_days,
-                                            self.cheq_daily_changes,
-                                            self.cheq_daily_balances)
-
-        # Define object attributes for monthly chequing account info
-        self.cheq_months = cheq_months
-        self.cheq_monthly_changes = cheq_monthly_changes
-        self.cheq_initial_monthly_balances = cheq_monthly_balances
-
-        # Define object attributes for saving account info
-        self.save_days = save_fill_days
-        self.save_daily_changes = save_fill_daily_changes
-        self.save_daily_balances = save_daily_balances
-
-        # Grab saving account info per month from per day
-        save_months, save_monthly_changes, save_monthly_balances = \
-            self.get_monthly_change_balance(self.save_days,
-                                            self.save_daily_changes,
-                                            self.save_daily_balances)
-
-        # Define object attributes for monthly chequing account info
-        self.save_months = save_months
-        self.save_monthly_changes = save_monthly_changes
-        self.save_initial_monthly_balances = save_monthly_balances
-
-        # Aggregate chequing and saving information into total banking info
-        bank_days = self.cheq_days + self.save_days
-        bank_changes = self.cheq_daily_changes + self.save_daily_changes
+        if date_window:
+            # Initial balances are for first day in csvs, so move them to
+            # just before window using cached totals of changes before it.
+            # Accounts with no changes in window keep that balance
+            # throughout, over the days of the window
+            self.initial_cheq_balance = self.get_window_opening_balance(
+                chequing_csv, initial_chequing, start_date)
+            self.initial_save_balance = self.get_window_opening_balance(
+                saving_csv, initial_saving, start_date)
+            window_first_day = start_date if start_date else end_date
+            window_last_day = end_date if end_date else start_date
+        else:
+            # Correct balances, by subtracting first day total change, so
+            # that balances are of changes immediately previous to change
+            # history
+            self.initial_cheq_balance -= cheq_daily_changes[0]
+            self.initial_save_balance -= save_daily_changes[0]
+            window_first_day = window_last_day = None
+
+        # Store accounts only on days with changes, leaving days without
+        # changes to be filled in when a dense daily view is asked for
+        self.cheq_series = SparseAccountSeries(
+            cheq_unique_days, cheq_daily_changes, self.initial_cheq_balance,
+            window_first_day, window_last_day)
+        self.save_series = SparseAccountSeries(
+            save_unique_days, save_daily_changes, self.initial_save_balance,
+            window_first_day, window_last_day)
+        self.daily_views = {}
+
+        # Grab chequing and saving account info per month
+        (self.cheq_months, self.cheq_monthly_changes,
+         self.cheq_initial_monthly_balances) = \
+            self.cheq_series.get_monthly_change_balance()
+        (self.save_months, self.save_monthly_changes,
+         self.save_initial_monthly_balances) = \
+            self.save_series.get_monthly_change_balance()
+
+        # Aggregate chequing and saving information into total banking info,
+        # converting changes to banking currency as of the day of change
+        bank_days = cheq_unique_days + save_unique_days
+        bank_changes = (
+            list(self.get_converted_daily_changes('cheq',
+                                                  self.bank_currency)) +
+            list(self.get_converted_daily_changes('save',
+                                                  self.bank_currency)))
 
         # Collapse dates and changes to a total account change on each date
         bank_unique_days, bank_daily_changes = self.collapse_date_change(
@@ -174,39 +788,228 @@ class BankingHistory():
         bank_unique_days.reverse()
         bank_daily_changes.reverse()
 
-        # Fill in days with no account changes with a 0. value account change,
-        # So that future plotting and statistics have a more consistent daily
-        # time interval to evaluate by
-        bank_fill_days, bank_fill_daily_changes = self.fill_no_transact_days(
-                bank_unique_days, bank_daily_changes)
-
         # Grab initial balance for combined accounts before any transactions.
         # The initial change subtraction has already happened individually
         # for chequing and saving initial balance so does not need to happen
         # again
-        self.initial_bank_balance = (self.initial_cheq_balance +
-                                     self.initial_save_balance)
-
-        # Convert daily changes into a daily balance
-        bank_daily_balances = self.convert_changes_to_balances(
-                self.initial_bank_balance, bank_fill_daily_changes)
-
-        # Define object attributes for total banking (combined saving and
-        # chequing accounts) info
-        self.bank_days = bank_fill_days
-        self.bank_daily_changes = bank_fill_daily_changes
-        self.bank_daily_balances = bank_daily_balances
-        
-        # Grab combined accounts info per month from per day
-        bank_months, bank_monthly_changes, bank_monthly_balances = \
-            self.get_monthly_change_balance(self.bank_days,
-                                            self.bank_daily_changes,
-                                            self.bank_daily_balances)
+        self.initial_bank_balance = (
+            self.convert_initial_balance('cheq', self.initial_cheq_balance) +
+            self.convert_initial_balance('save', self.initial_save_balance))
+
+        # Store total banking (combined saving and chequing accounts) info
+        # only on days with changes, and grab its info per month
+        self.bank_series = SparseAccountSeries(
+            bank_unique_days, bank_daily_changes, self.initial_bank_balance,
+            window_first_day, window_last_day)
+        (self.bank_months, self.bank_monthly_changes,
+         self.bank_initial_monthly_balances) = \
+            self.bank_series.get_monthly_change_balance()
+
+    # Total changes up to each day of each csv file loaded, keyed by path
+    # and stored with size and modification time, so an edited file replaces
+    # its stale entry rather than adding another
+    csv_totals_cache = {}
+
+    # Dense daily history of each account, built on first access
+    cheq_days = property(lambda self: self.get_daily_view('cheq')[0])
+    cheq_daily_changes = property(lambda self: self.get_daily_view('cheq')[1])
+    cheq_daily_balances = property(
+        lambda self: self.get_daily_view('cheq')[2])
+    save_days = property(lambda self: self.get_daily_view('save')[0])
+    save_daily_changes = property(lambda self: self.get_daily_view('save')[1])
+    save_daily_balances = property(
+        lambda self: self.get_daily_view('save')[2])
+    bank_days = property(lambda self: self.get_daily_view('bank')[0])
+    bank_daily_changes = property(lambda self: self.get_daily_view('bank')[1])
+    bank_daily_balances = property(
+        lambda self: self.get_daily_view('bank')[2])
+
+    def get_daily_view(self, account, start_date=None, end_date=None):
+        """ Grab dense daily days, changes, and balances of account over a
+        range, filling days with no changes with a 0. value change. The view
+        of the whole history is cached once built.
 
-        # Define object attributes for monthly chequing account info
-        self.bank_months = bank_months
-        self.bank_monthly_changes = bank_monthly_changes
-        self.bank_initial_monthly_balances = bank_monthly_balances
+        Parameters
+        ---
+        account : str
+            Prefix of account, one of 'cheq', 'save', or 'bank'.
+        start_date : datetime.datetime or None
+            First day of view, first day of history if None.
+        end_date : datetime.datetime or None
+            Last day of view, last day of history if None.
+
+        Returns
+        ---
+        days : list of datetime.datetime
+            Every day in range.
+        changes : list of float
+            Total account change on each day.
+        balances : list of float
+            Balance on each day.
+
+        """
+        series = getattr(self, account + '_series')
+        if start_date is not None or end_date is not None:
+            return(series.get_daily_view(start_date, end_date))
+
+        if account not in self.daily_views:
+            self.daily_views[account] = series.get_daily_view()
+
+        return(self.daily_views[account])
+
+    def load_transaction_window(self, csv_path, start_date=None,
+                                end_date=None):
+        """ Load rows of transaction history csv with dates in a window,
+        without reading the rest of the file. Relies on rows being sorted
+        from latest to earliest date, as exported by the bank.
+
+        The file is memory-mapped, and the first row on or before end_date
+        found by binary search over byte offsets, each probe moving to the
+        start of the next line. Rows are then scanned until one is earlier
+        than start_date. As with the full load, the first line is taken as
+        a header.
+
+        Parameters
+        ---
+        csv_path : str
+            Path to csv of transactions.
+        start_date : datetime.datetime or None
+            First day of window, no limit if None.
+        end_date : datetime.datetime or None
+            Last day of window, no limit if None.
+
+        Returns
+        ---
+        csv_rows : list of tuple(str, str)
+            Date and account change of each row in window, in file order.
+
+        """
+        with open(csv_path, 'rb') as csv_file:
+            if os.fstat(csv_file.fileno()).st_size == 0:
+                return([])
+            csv_map = mmap.mmap(csv_file.fileno(), 0,
+                                access=mmap.ACCESS_READ)
+
+        def next_line_start(position):
+            # Start of first line at or after position
+            if position <= data_start:
+                return(data_start)
+            newline = csv_map.find(b'\n', position - 1)
+            return(len(csv_map) if newline == -1 else newline + 1)
+
+        def read_row(line_start):
+            line_end = csv_map.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = len(csv_map)
+            fields = csv_map[line_start:line_end].decode().strip().split(',')
+            return(line_end + 1, fields)
+
+        def row_date(fields):
+            return(datetime.datetime.strptime(fields[0], "%m/%d/%Y"))
+
+        try:
+            header_end = csv_map.find(b'\n')
+            data_start = len(csv_map) if header_end == -1 else header_end + 1
+
+            # Binary search for first row on or before end_date
+            low = data_start
+            high = len(csv_map)
+            if end_date is not None:
+                while low < high:
+                    middle = (low + high)//2
+                    line_start = next_line_start(middle)
+                    if line_start >= len(csv_map):
+                        high = middle
+                        continue
+                    fields = read_row(line_start)[1]
+                    if fields == [''] or row_date(fields) <= end_date:
+                        high = middle
+                    else:
+                        low = middle + 1
+
+            # Scan rows until one is before start_date
+            csv_rows = []
+            line_start = next_line_start(low)
+            while line_start < len(csv_map):
+                line_start, fields = read_row(line_start)
+                if fields == ['']:
+                    continue
+                if start_date is not None and row_date(fields) < start_date:
+                    break
+                csv_rows.append((fields[0], fields[1]))
+        finally:
+            csv_map.close()
+
+        return(csv_rows)
+
+    def get_csv_totals(self, csv_path):
+        """ Grab total account change up to and including each day in a
+        transaction history csv, cached per file so later windows of the same
+        file need not read outside the window.
+
+        Parameters
+        ---
+        csv_path : str
+            Path to csv of transactions.
+
+        Returns
+        ---
+        csv_totals : tuple(numpy.ndarray, numpy.ndarray)
+            Days with changes, as numpy.datetime64 in increasing order, and
+            total account change up to and including each day.
+
+        """
+        csv_stat = os.stat(csv_path)
+        cache_key = os.path.abspath(csv_path)
+        csv_stamp = (csv_stat.st_size, csv_stat.st_mtime_ns)
+        cached = self.csv_totals_cache.get(cache_key)
+        if cached is None or cached[0] != csv_stamp:
+            csv_rows = pd.read_csv(csv_path)
+            row_days = pd.to_datetime(csv_rows.iloc[:, 0], format='%m/%d/%Y')
+            daily_changes = csv_rows.iloc[:, 1].astype(float).round(2).groupby(
+                row_days).sum().round(2)
+            cached = (csv_stamp,
+                      (daily_changes.index.values.astype('datetime64[D]'),
+                       np.cumsum(daily_changes.values)))
+            self.csv_totals_cache[cache_key] = cached
+
+        return(cached[1])
+
+    def get_window_opening_balance(self, csv_path, initial_balance,
+                                   start_date):
+        """ Move initial balance of account from first day in csv to just
+        before a window, adding total changes between them.
+
+        Parameters
+        ---
+        csv_path : str
+            Path to csv of transactions.
+        initial_balance : float
+            Balance on first day in csv, after changes that day.
+        start_date : datetime.datetime or None
+            First day of window, first day in csv if None.
+
+        Returns
+        ---
+        opening_balance : float
+            Balance before any changes on start_date.
+
+        """
+        days, cumulative_totals = self.get_csv_totals(csv_path)
+        if len(days) == 0:
+            return(initial_balance)
+
+        # Total of changes before window, none if window starts with csv
+        if start_date is None:
+            window_index = 0
+        else:
+            window_index = np.searchsorted(
+                days, np.datetime64(start_date, 'D'), side='left')
+        total_before_window = (
+            cumulative_totals[window_index - 1] if window_index > 0 else 0.)
+
+        return(round(float(initial_balance - cumulative_totals[0] +
+                           total_before_window), 2))
 
     def extract_datetime_accountchange(self, csv_rows):
         """ From the loaded csv list of tuples of strings, extract a list of
@@ -260,181 +1063,436 @@ class BankingHistory():
         ---
         collapsed_dates : list
             List of datetime.datetime objects representing unique dates in
-            list_of_dates. Sorted in increasing time order.
+            list_of_dates. Sorted in decreasing time order.
         collapsed_changes : list
             List of floats of total account changes on dates.
 
         """
-        # Get unique dates and sort them
-        unique_dates = list(set(list_of_dates))
-        sorted_unique_dates = list(np.flipud(np.sort(unique_dates)))
-
-        # Zip date lists and changes lists to relate changes to dates
-        zipped_date_change = list(zip(list_of_dates, list_of_changes))
-
-        # Use sorted list of unique dates to find all account changes on each
-        # date, and grab a total change for the date
-        collapsed_dates = []
-        collapsed_changes = []
-        for date_temp in sorted_unique_dates:
-            change_on_date = [
-                tup[1] for tup in zipped_date_change if tup[0] == date_temp]
-            collapsed_dates.append(date_temp)
-            collapsed_changes.append(round(sum(change_on_date), 2))
+        # Group account changes by date in a single pass, keeping the order
+        # changes are listed in
+        changes_on_dates = {}
+        for date_temp, change in zip(list_of_dates, list_of_changes):
+            changes_on_dates.setdefault(date_temp, []).append(change)
+
+        # Grab a total change for each date, from latest to earliest date
+        collapsed_dates = sorted(changes_on_dates, reverse=True)
+        collapsed_changes = [
+            round(sum(changes_on_dates[date_temp]), 2)
+            for date_temp in collapsed_dates]
 
         return(collapsed_dates, collapsed_changes)
 
-    def fill_no_transact_days(self, list_of_dates, list_of_changes):
-        """ Fills in non listed days (dates with no transactions) to make
-        plotting and monthly time intervals more consistent.
+    def match_transfers(self, from_dates, from_changes, to_dates, to_changes,
+                        day_tolerance):
+        """ Pair transactions in one account with transactions of opposite
+        sign and equal amount in another account within a number of days,
+        as the two legs of a transfer between the accounts.
+
+        Transactions of the second account are hashed by amount in cents,
+        each into a queue ordered by date. Going through the first account
+        in date order, queued transactions too early to match are dropped
+        and the earliest one left within tolerance is paired, so each
+        transaction is queued and dequeued at most once and matching is
+        linear in the number of transactions (after sorting by date).
 
         Parameters
         ---
-        list_of_dates : list
-            List of datetime.datetime objects representing the date of each
-            account change in list_of_changes.
-        list_of_changes : list
-            List of floats of total account changes on dates, in same order
-            as list_of_dates.
+        from_dates : list of datetime.datetime
+            Date of each transaction in first account.
+        from_changes : list of float
+            Account change of each transaction in first account.
+        to_dates : list of datetime.datetime
+            Date of each transaction in second account.
+        to_changes : list of float
+            Account change of each transaction in second account.
+        day_tolerance : int
+            Maximum number of days between legs of a transfer.
 
         Returns
         ---
-        all_days : list
-            List of datetime.datetime objects, similar to list_of_dates but
-            with no gaps between transaction dates.
-        all_changes : list
-            List of floats of total account changes on dates, with no
-            transaction dates with a 0. value.
+        from_transfer_flags : list of bool
+            Whether each transaction in first account is a transfer leg.
+        to_transfer_flags : list of bool
+            Whether each transaction in second account is a transfer leg.
 
         """
-        # Set current day to first day given
-        current_day = list_of_dates[0]
-        last_day = list_of_dates[-1]
-        day_delta = datetime.timedelta(days=1)
+        tolerance = datetime.timedelta(days=day_tolerance)
+
+        # Queue transactions of second account by amount in cents, in date
+        # order
+        to_queues = {}
+        for i in sorted(range(len(to_dates)), key=lambda i: to_dates[i]):
+            to_queues.setdefault(
+                int(round(to_changes[i]*100)), deque()).append(i)
+
+        from_transfer_flags = [False]*len(from_dates)
+        to_transfer_flags = [False]*len(to_dates)
+        for i in sorted(range(len(from_dates)), key=lambda i: from_dates[i]):
+            queue = to_queues.get(-int(round(from_changes[i]*100)))
+            if not queue or from_changes[i] == 0:
+                continue
+
+            # Later transactions of first account can not match those too
+            # early for this one, so they can be dropped
+            while queue and to_dates[queue[0]] < from_dates[i] - tolerance:
+                queue.popleft()
+            if queue and to_dates[queue[0]] <= from_dates[i] + tolerance:
+                from_transfer_flags[i] = True
+                to_transfer_flags[queue.popleft()] = True
+
+        return(from_transfer_flags, to_transfer_flags)
+
+    def get_converted_daily_changes(self, account, target_currency):
+        """ Grab daily changes of account converted to a currency, at the
+        rate as of each day, caching the result for the account and
+        currency.
 
-        # Create dictionary to lookup day and total change on that day
-        day_change_lookup = dict(zip(list_of_dates, list_of_changes))
-
-        # For every day until the last day, check if exists in list_of_dates
-        # and append the correct change if does. If not in, appends 0
-        all_days = []
-        all_changes = []
-        while(current_day <= last_day):
-            all_days.append(current_day)
-            if current_day in list_of_dates:
-                all_changes.append(day_change_lookup[current_day])
-            else:
-                all_changes.append(0.)
-            current_day += day_delta
+        Parameters
+        ---
+        account : str
+            Prefix of account, either 'cheq' or 'save'.
+        target_currency : str or None
+            Currency to convert changes to.
 
-        return(all_days, all_changes)
+        Returns
+        ---
+        converted_changes : numpy.ndarray of float
+            Changes of account on each of its days with changes, in target
+            currency rounded to the cent. Unconverted if account is already
+            in target currency.
 
-    def convert_changes_to_balances(self, initial_balance, list_of_changes):
-        """ Converts list of floats representing account changes, into the
-        balance in the account at the time.
+        """
+        series = getattr(self, account + '_series')
+        account_currency = getattr(self, account + '_currency')
+        if account_currency == target_currency:
+            return(series.daily_changes)
+
+        if (account, target_currency) not in self.converted_daily_changes:
+            if self.fx_rates is None:
+                raise ValueError(
+                    'Exchange rates are needed to convert {} to {}.'.format(
+                        account_currency, target_currency))
+            self.converted_daily_changes[(account, target_currency)] = \
+                self.fx_rates.convert(
+                    series.change_days, series.daily_changes,
+                    account_currency, target_currency).round(2)
+
+        return(self.converted_daily_changes[(account, target_currency)])
+
+    def convert_initial_balance(self, account, balance):
+        """ Convert a balance of account prior to its history to banking
+        currency, at the rate as of the first day of history.
 
         Parameters
         ---
-        initial_balance : float
-            Amount in account before any changes in list_of_changes.
-        list_of_changes : list
-            List of floats representing changes to account on each day.
+        account : str
+            Prefix of account, either 'cheq' or 'save'.
+        balance : float
+            Balance in account currency.
 
         Returns
         ---
-        rounded_balances : list
-            List of floats representing balance on each date rounded to the
-            cent.
+        converted_balance : float
+            Balance in banking currency.
 
         """
-        cumulative_sum_changes = np.cumsum(list_of_changes)
-        balances_from_changes = initial_balance + cumulative_sum_changes
+        account_currency = getattr(self, account + '_currency')
+        if account_currency == self.bank_currency:
+            return(balance)
+        if self.fx_rates is None:
+            raise ValueError(
+                'Exchange rates are needed to convert {} to {}.'.format(
+                    account_currency, self.bank_currency))
+
+        return(float(self.fx_rates.convert(
+            [getattr(self, account + '_series').first_day], [balance],
+            account_currency, self.bank_currency)[0]))
+
+    def get_monthly_flows(self, account='bank', exclude_transfers=True):
+        """ Total inflows and outflows of account on each month, optionally
+        excluding transfers between chequing and saving accounts.
 
-        # Round each days balance to 2 decimal places
-        rounded_balances = [
-            round(balance, 2) for balance in balances_from_changes
-            ]
+        Parameters
+        ---
+        account : str
+            Prefix of account, one of 'cheq', 'save', or 'bank'.
+        exclude_transfers : bool
+            Leave out transactions flagged as legs of a transfer.
 
-        return(rounded_balances)
+        Returns
+        ---
+        months : list of datetime.datetime
+            Months of account, as in account monthly changes.
+        monthly_inflows : list of float
+            Total of positive changes on each month.
+        monthly_outflows : list of float
+            Total of negative changes on each month.
 
-    def get_monthly_change_balance(self, list_of_dates, list_of_changes,
-                                   list_of_balances):
-        """ Collapse daily account changes and balances, into a monthly
-        account changes and balances.
+        """
+        # Banking account flows are those of both accounts, in banking
+        # currency
+        if account == 'bank':
+            sub_accounts = ('cheq', 'save')
+        else:
+            sub_accounts = (account,)
+
+        months = getattr(self, account + '_months')
+        month_indices = {month: i for i, month in enumerate(months)}
+        monthly_inflows = [0.]*len(months)
+        monthly_outflows = [0.]*len(months)
+        for sub_account in sub_accounts:
+            dates = getattr(self, sub_account + '_transaction_days')
+            changes = getattr(self, sub_account + '_transaction_changes')
+            flags = getattr(self, sub_account + '_transfer_flags')
+            if account == 'bank':
+                changes = self.convert_transaction_changes(sub_account)
+
+            for date, change, flag in zip(dates, changes, flags):
+                if exclude_transfers and flag:
+                    continue
+                month_index = month_indices.get(
+                    datetime.datetime(day=1, month=date.month,
+                                      year=date.year))
+                if month_index is None:
+                    continue
+                if change > 0:
+                    monthly_inflows[month_index] += change
+                else:
+                    monthly_outflows[month_index] += change
+
+        return(months,
+               [round(inflow, 2) for inflow in monthly_inflows],
+               [round(outflow, 2) for outflow in monthly_outflows])
+
+    def convert_transaction_changes(self, account):
+        """ Convert each transaction change of account to banking currency,
+        at the rate as of the day of the transaction.
 
         Parameters
         ---
-        list_of_dates : list of datetime.datetime
-            List of dates corresponding to account changes and balances.
-        list_of_changes : list of float
-            List of account changes.
-        list_of_balances : list of float
-            List of account balances.
+        account : str
+            Prefix of account, either 'cheq' or 'save'.
 
         Returns
         ---
-        sorted_unique_month_years : list of datetime.datetime
-            List of dates of months for each months' account changes and
-            balances.
-        monthly_account_changes
-            List of total monthly account changes.
-        monthly_account_balances
-            List of initial monthly account balances
+        converted_changes : list of float
+            Transaction changes in banking currency.
 
         """
-        # Zip dates to changes and balances, and convert dates into just month
-        # and year, with day for all set to the first of the month.
-        zipped_day_change_balance = list(zip(list_of_dates,
-                                             list_of_changes,
-                                             list_of_balances))
+        account_currency = getattr(self, account + '_currency')
+        changes = getattr(self, account + '_transaction_changes')
+        if account_currency == self.bank_currency:
+            return(changes)
+        if self.fx_rates is None:
+            raise ValueError(
+                'Exchange rates are needed to convert {} to {}.'.format(
+                    account_currency, self.bank_currency))
+
+        return(list(self.fx_rates.convert(
+            getattr(self, account + '_transaction_days'), changes,
+            account_currency, self.bank_currency)))
+
+    def get_transaction_size_sketch(self, accounts=('cheq', 'save'),
+                                    start_month=None, end_month=None):
+        """ Combine sketches of transaction sizes over accounts and a range
+        of months, for estimating quantiles and histograms of sizes.
 
-        zipped_month_change_balance = [
-            (datetime.datetime(day=1, month=date.month, year=date.year),
-             change,
-             balance)
-            for date, change, balance in zipped_day_change_balance
-        ]
+        Parameters
+        ---
+        accounts : tuple of str
+            Prefixes of accounts to combine, of 'cheq' and 'save'.
+        start_month : datetime.datetime or None
+            First month to combine, no limit if None.
+        end_month : datetime.datetime or None
+            Last month to combine, no limit if None.
 
-        # Grab sorted list of unique month, year combos to iterate and
-        # collapse on each
-        month_years = [tup[0] for tup in zipped_month_change_balance]
-        sorted_unique_month_years = list(np.sort(list(set(month_years))))
+        Returns
+        ---
+        sketch : QuantileSketch
+            Sketch of absolute transaction changes in banking currency.
 
-        # For each month year, grab the balance at the start of the month
-        # and total account changes on that month
-        monthly_account_changes = []
-        monthly_account_balances = []
-        for month_year_temp in sorted_unique_month_years:
+        """
+        sketch = QuantileSketch()
+        for (account, month), month_sketch in sorted(
+                self.transaction_size_sketches.items()):
+            if (account in accounts and
+                (start_month is None or month >= start_month) and
+                (end_month is None or month <= end_month)):
+                    sketch.merge(month_sketch)
+
+        return(sketch)
+
+    def project_monthly_balances(self, n_months, account='bank',
+                                 n_paths=10000, percentiles=(5, 25, 50, 75,
+                                                             95),
+                                 chunk_size=10000, seed=None, n_bins=4096):
+        """ Monte Carlo projection of future monthly balances, by resampling
+        the history of monthly account changes with replacement.
+
+        Every path is simulated at once as rows of a (paths, months) array,
+        processed chunk_size paths at a time so that memory stays bounded
+        regardless of n_paths. Balances of each chunk are counted into a
+        fixed-bin histogram for each month, spanning every balance reachable
+        by that month, and percentiles are interpolated from the combined
+        histograms. Paths are drawn from the same random stream however they
+        are chunked, so results do not depend on chunk_size. Percentiles are
+        within one bin width, (largest - smallest monthly change) * month /
+        n_bins, of the percentiles of the simulated paths, so percentiles 0
+        and 100 are within a bin of the smallest and largest balances.
 
-            change_on_month = [
-                change for
-                month_year, change, balance in zipped_month_change_balance
-                if month_year == month_year_temp
-            ]
+        Parameters
+        ---
+        n_months : int
+            Number of future months to project.
+        account : str
+            Prefix of account to project, one of 'cheq', 'save', or 'bank'.
+        n_paths : int
+            Number of simulated balance paths.
+        percentiles : tuple of float
+            Percentiles, between 0 and 100, of balance to give each month.
+        chunk_size : int
+            Maximum number of paths simulated in a single array.
+        seed : int or None
+            Seed for random number generator, for reproducible projections.
+        n_bins : int
+            Number of histogram bins for balances of each month.
 
-            # Get initial balance for each month. If data starts after the
-            # first day of the first month, will get IndexError and thus just
-            # use first balance in history as that will be first date.
-            try:
-                initial_month_balance = [
-                    balance
-                    for date, change, balance in zipped_day_change_balance
-                    if date == month_year_temp
-                ][0]
-            except IndexError:
-                initial_month_balance = zipped_day_change_balance[0][2]
+        Returns
+        ---
+        projection_months : list of datetime.datetime
+            First of each month following the last month of history.
+        percentile_bands : dict of float to list of float
+            Balance at end of each projected month for each percentile,
+            rounded to the cent.
 
-            monthly_account_changes.append(round(sum(change_on_month), 2))
-            monthly_account_balances.append(initial_month_balance)
+        """
+        if n_months < 1:
+            raise ValueError('Must project at least 1 month, not {}.'.format(
+                n_months))
+        monthly_changes = np.array(getattr(self, account + '_monthly_changes'))
+        if len(monthly_changes) == 0:
+            raise ValueError('No monthly changes to project from.')
+        final_balance = getattr(self, account + '_series').get_final_balance()
+        rng = np.random.default_rng(seed)
+
+        # Months following last month of history, carrying over into
+        # following years
+        last_month = getattr(self, account + '_months')[-1]
+        projection_months = []
+        for i in range(1, n_months + 1):
+            year, month = divmod(last_month.month - 1 + i, 12)
+            projection_months.append(datetime.datetime(
+                day=1, month=month + 1, year=last_month.year + year))
+
+        # Bins of each month span balances reachable by always taking the
+        # smallest or largest monthly change
+        months_ahead = np.arange(1, n_months + 1)
+        bin_lows = final_balance + months_ahead*monthly_changes.min()
+        bin_widths = np.maximum(
+            months_ahead*(monthly_changes.max() - monthly_changes.min()),
+            0.01) / n_bins
+        bin_counts = np.zeros(n_months*n_bins, dtype=np.int64)
+
+        # Simulate each chunk of paths as a cumulative sum of resampled
+        # monthly changes, counting balances into bins of each month. Each
+        # sample takes one uniform draw so the random stream does not depend
+        # on chunk sizes
+        paths_done = 0
+        while paths_done < n_paths:
+            paths_in_chunk = min(chunk_size, n_paths - paths_done)
+            sample_indices = (
+                rng.random((paths_in_chunk, n_months)) *
+                len(monthly_changes)).astype(int)
+            paths = final_balance + np.cumsum(
+                monthly_changes[sample_indices], axis=1)
+            path_bins = np.clip(
+                ((paths - bin_lows) / bin_widths).astype(int), 0, n_bins - 1)
+            bin_counts += np.bincount(
+                (path_bins + n_bins*np.arange(n_months)).ravel(),
+                minlength=n_months*n_bins)
+            paths_done += paths_in_chunk
+
+        # Interpolate percentiles within the bin their count falls in, which
+        # for a count of 0 is the first bin any path reached
+        cumulative_counts = np.cumsum(bin_counts.reshape(n_months, n_bins),
+                                      axis=1)
+        percentile_bands = {}
+        for percentile in percentiles:
+            target_counts = percentile/100*n_paths
+            search_side = 'right' if target_counts == 0 else 'left'
+            band_bins = np.array([
+                min(np.searchsorted(month_counts, target_counts, search_side),
+                    n_bins - 1)
+                for month_counts in cumulative_counts])
+            counts_below = np.where(
+                band_bins > 0,
+                cumulative_counts[np.arange(n_months), band_bins - 1], 0)
+            counts_in_bin = (cumulative_counts[np.arange(n_months), band_bins]
+                             - counts_below)
+            bin_fractions = np.clip(
+                (target_counts - counts_below) / np.maximum(counts_in_bin, 1),
+                0., 1.)
+            band = bin_lows + (band_bins + bin_fractions)*bin_widths
+            percentile_bands[percentile] = [
+                round(balance, 2) for balance in band]
+
+        return(projection_months, percentile_bands)
+
+    def shift_initial_balances(self, initial_chequing, initial_saving):
+        """ Changes initial balances of accounts, shifting the already
+        calculated balance segments by the difference rather than
+        recalculating history, as changes do not depend on balances.
 
-        return(sorted_unique_month_years, monthly_account_changes,
-               monthly_account_balances)
+        Parameters
+        ---
+        initial_chequing : float
+            New initial balance in chequing account.
+        initial_saving : float
+            New initial balance in saving account.
 
-    def plot_pdf(self, pdf_path):
+        """
+        # Balances are linear in initial balances entered, so shift by
+        # difference from those
+        cheq_offset = initial_chequing - self.entered_initial_balances[0]
+        save_offset = initial_saving - self.entered_initial_balances[1]
+        self.entered_initial_balances = (initial_chequing, initial_saving)
+        bank_offset = (self.convert_initial_balance('cheq', cheq_offset) +
+                       self.convert_initial_balance('save', save_offset))
+
+        self.initial_cheq_balance += cheq_offset
+        self.initial_save_balance += save_offset
+        self.initial_bank_balance += bank_offset
+
+        # Shift balance segments of each account, regrabbing balances at
+        # start of the months already found, and dropping dense daily views
+        # built from the previous balances
+        for account, offset in (('cheq', cheq_offset), ('save', save_offset),
+                                ('bank', bank_offset)):
+            series = getattr(self, account + '_series')
+            series.shift_balances(offset)
+            setattr(self, account + '_initial_monthly_balances',
+                    series.get_balances_on(
+                        [max(month, series.first_day)
+                         for month in getattr(self, account + '_months')]
+                    ).tolist())
+        self.daily_views = {}
+
+    def plot_pdf(self, pdf_path, exclude_transfers=True):
         """
         """
         plt.style.use('ggplot')
 
+        # Monthly changes plotted, leaving out transfers between chequing and
+        # saving accounts so they are not counted as spending or income
+        if exclude_transfers:
+            cheq_monthly_changes = np.add(
+                *self.get_monthly_flows('cheq')[1:]).round(2)
+            bank_monthly_changes = np.add(
+                *self.get_monthly_flows('bank')[1:]).round(2)
+        else:
+            cheq_monthly_changes = np.array(self.cheq_monthly_changes)
+            bank_monthly_changes = np.array(self.bank_monthly_changes)
+
         fig = plt.figure(figsize=(12, 18))
         spec = gridspec.GridSpec(ncols=2, nrows=4, figure=fig)
 
@@ -450,31 +1508,37 @@ class BankingHistory():
                       fontsize=14)
         title_ax.text(.02, .65, 'Initial Balance', fontsize=20)
         title_ax.text(.02, .55, 'Initial Date: {}'.format(
-            datetime.datetime.strftime(self.bank_days[0],
+            datetime.datetime.strftime(self.bank_series.first_day,
                                        '%A, %B %d %Y')),
             fontsize=14, va='top')
         title_ax.text(.02, .45,
-                      'Chequing: {}'.format(self.cheq_daily_balances[0]),
+                      'Chequing: {}'.format(
+                          self.cheq_series.get_first_balance()),
                       fontsize=14, va='top')
         title_ax.text(.02, .35,
-                      'Saving: {}'.format(self.save_daily_balances[0]),
+                      'Saving: {}'.format(
+                          self.save_series.get_first_balance()),
                       fontsize=14, va='top')
         title_ax.text(.02, .25,
-                      'Total: {}'.format(self.bank_daily_balances[0]),
+                      'Total: {}'.format(
+                          self.bank_series.get_first_balance()),
                       fontsize=14, va='top')
         title_ax.text(.51, .65, 'Final Balance', fontsize=20)
         title_ax.text(.51, .55, 'Final Date: {}'.format(
-            datetime.datetime.strftime(self.bank_days[-1],
+            datetime.datetime.strftime(self.bank_series.last_day,
                                        '%A, %B %d %Y')),
             fontsize=14, va='top')
         title_ax.text(.51, .45,
-                      'Chequing: {}'.format(self.cheq_daily_balances[-1]),
+                      'Chequing: {}'.format(
+                          self.cheq_series.get_final_balance()),
                       fontsize=14, va='top')
         title_ax.text(.51, .35,
-                      'Saving: {}'.format(self.save_daily_balances[-1]),
+                      'Saving: {}'.format(
+                          self.save_series.get_final_balance()),
                       fontsize=14, va='top')
         title_ax.text(.51, .25,
-                      'Total: {}'.format(self.bank_daily_balances[-1]),
+                      'Total: {}'.format(
+                          self.bank_series.get_final_balance()),
                       fontsize=14, va='top')
         title_ax.tick_params(axis='both', labelbottom=False, labelleft=False,
                              left=False, bottom=False)
@@ -482,20 +1546,16 @@ class BankingHistory():
         # Plot changes to chequing account to give an idea on general spending
         cheq_change_ax = fig.add_subplot(spec[1, 0:2])
         cheq_change_ax.bar(
-            np.array(self.cheq_months)[np.array(self.cheq_monthly_changes)>0],
-            np.array(self.cheq_monthly_changes)[
-                np.array(self.cheq_monthly_changes)>0],
+            np.array(self.cheq_months)[cheq_monthly_changes>0],
+            cheq_monthly_changes[cheq_monthly_changes>0],
                 12, color=Category20_20[4])
         cheq_change_ax.bar(
-            np.array(self.cheq_months)[np.array(self.cheq_monthly_changes)<0],
-            np.array(self.cheq_monthly_changes)[
-                np.array(self.cheq_monthly_changes)<0],
+            np.array(self.cheq_months)[cheq_monthly_changes<0],
+            cheq_monthly_changes[cheq_monthly_changes<0],
                 12, color=Category20_20[6])
         cheq_change_ax.bar(
-            np.array(self.cheq_months)[
-                np.array(self.cheq_monthly_changes)==0],
-            np.array(self.cheq_monthly_changes)[
-                np.array(self.cheq_monthly_changes)==0],
+            np.array(self.cheq_months)[cheq_monthly_changes==0],
+            cheq_monthly_changes[cheq_monthly_changes==0],
                 12, color=Category20_20[0])
         cheq_change_ax.set_ylabel('Chequing Account Changes')
         cheq_change_ax.margins(x=0.025)
@@ -504,22 +1564,16 @@ class BankingHistory():
         # in easier colored visual (More green is good, more red is bad)
         bank_change_ax = fig.add_subplot(spec[2, 0:2])
         bank_change_ax.bar(
-            np.array(self.bank_months)[
-                np.array(self.bank_monthly_changes)>0],
-            np.array(self.bank_monthly_changes)[
-                np.array(self.bank_monthly_changes)>0],
+            np.array(self.bank_months)[bank_monthly_changes>0],
+            bank_monthly_changes[bank_monthly_changes>0],
                 12, color=Category20_20[4])
         bank_change_ax.bar(
-            np.array(self.bank_months)[
-                np.array(self.bank_monthly_changes)<0],
-            np.array(self.bank_monthly_changes)[
-                np.array(self.bank_monthly_changes)<0],
+            np.array(self.bank_months)[bank_monthly_changes<0],
+            bank_monthly_changes[bank_monthly_changes<0],
                 12, color=Category20_20[6])
         bank_change_ax.bar(
-            np.array(self.bank_months)[
-                np.array(self.bank_monthly_changes)==0],
-            np.array(self.bank_monthly_changes)[
-                np.array(self.bank_monthly_changes)==0],
+            np.array(self.bank_months)[bank_monthly_changes==0],
+            bank_monthly_changes[bank_monthly_changes==0],
                 12, color=Category20_20[0])
         bank_change_ax.set_ylabel('Total Bank Changes')
         bank_change_ax.margins(x=0.025)
@@ -537,17 +1591,513 @@ class BankingHistory():
         bank_bal_ax.margins(x=0.025)
 
         # Save pdf_path, incrementing bracketed number until pdf does not
-        # exist, so that previous ones are not overwritten
+        # exist, so that previous ones are not overwritten. The pdf is
+        # created exclusively so that reports saved at the same time by
+        # other processes cannot claim the same path
         initial_pdf_path = pdf_path + '\\FinancialSummary.pdf'
-        if os.path.isfile(initial_pdf_path):
-            initial_pdf_path = initial_pdf_path.replace('.pdf', ' (1).pdf')
-            increment_count = 2
-            while(os.path.isfile(initial_pdf_path)):
-                initial_pdf_path = initial_pdf_path.replace(
-                    '({}).pdf'.format(increment_count-1),
-                    '({}).pdf'.format(increment_count))
+        increment_count = 1
+        while True:
+            try:
+                pdf_file = open(initial_pdf_path, 'xb')
+                break
+            except FileExistsError:
+                initial_pdf_path = pdf_path + \
+                    '\\FinancialSummary ({}).pdf'.format(increment_count)
                 increment_count += 1
-        plt.savefig(initial_pdf_path)
+        try:
+            with pdf_file:
+                plt.savefig(pdf_file, format='pdf')
+        except Exception:
+            os.remove(initial_pdf_path)
+            raise
+        finally:
+            plt.close(fig)
+
+        return(initial_pdf_path)
+
+
+class RollingAnalytics():
+    """ Rolling window statistics over the filled daily series of a
+    BankingHistory, for any of the chequing, saving, or banking accounts.
+
+    Sums, means, and variances are taken as differences of prefix sums, and
+    minimums and maximums with monotonic deques, so every statistic is O(n)
+    in the number of days regardless of window size. Windows ending in the
+    first window - 1 days use only the days available so far.
+
+    Attributes
+    ---
+    banking_history : BankingHistory
+        Banking history the daily series are taken from.
+
+    """
+    def __init__(self, banking_history):
+        """ Sets banking history to compute rolling statistics on.
+
+        Parameters
+        ---
+        banking_history : BankingHistory
+            Banking history with filled daily changes and balances.
+
+        """
+        self.banking_history = banking_history
+
+    def check_window(self, window):
+        """ Raise ValueError if window does not contain at least one day. """
+        if window < 1:
+            raise ValueError(
+                'Window must be at least 1 day, not {}.'.format(window))
+
+    def rolling_sum(self, values, window):
+        """ Sum of values over the window ending on each day.
+
+        Parameters
+        ---
+        values : list of float
+            Daily values.
+        window : int
+            Number of days in window.
+
+        Returns
+        ---
+        window_sums : numpy.ndarray
+            Sum of window ending on each day.
+
+        """
+        self.check_window(window)
+        prefix_sums = np.concatenate(([0.], np.cumsum(values)))
+        ends = np.arange(1, len(values) + 1)
+        starts = np.maximum(ends - window, 0)
+
+        return(prefix_sums[ends] - prefix_sums[starts])
+
+    def rolling_mean(self, values, window):
+        """ Mean of values over the window ending on each day.
+
+        Parameters
+        ---
+        values : list of float
+            Daily values.
+        window : int
+            Number of days in window.
+
+        Returns
+        ---
+        window_means : numpy.ndarray
+            Mean of window ending on each day.
+
+        """
+        window_counts = np.minimum(np.arange(1, len(values) + 1), window)
+
+        return(self.rolling_sum(values, window) / window_counts)
+
+    def rolling_variance(self, values, window):
+        """ Population variance of values over the window ending on each day.
+
+        Parameters
+        ---
+        values : list of float
+            Daily values.
+        window : int
+            Number of days in window.
+
+        Returns
+        ---
+        window_variances : numpy.ndarray
+            Variance of window ending on each day.
+
+        """
+        self.check_window(window)
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return(np.array([]))
+
+        # Shift values by their first value to limit cancellation error when
+        # subtracting squared mean from mean of squares on large balances
+        shifted_values = values - values[0]
+        window_variances = (
+            self.rolling_mean(shifted_values**2, window) -
+            self.rolling_mean(shifted_values, window)**2)
+
+        return(np.maximum(window_variances, 0.))
+
+    def rolling_extreme(self, values, window, use_max=True):
+        """ Minimum or maximum of values over the window ending on each day,
+        keeping a deque of indices whose values are monotonic so each index
+        is added and removed at most once.
+
+        Parameters
+        ---
+        values : list of float
+            Daily values.
+        window : int
+            Number of days in window.
+        use_max : bool
+            Grab maximum if True, and minimum if False.
+
+        Returns
+        ---
+        window_extremes : numpy.ndarray
+            Extreme of window ending on each day.
+
+        """
+        self.check_window(window)
+        sign = 1. if use_max else -1.
+        window_extremes = np.empty(len(values))
+        candidates = deque()
+        for i, value in enumerate(values):
+            # Drop candidates that can no longer be the extreme, as the new
+            # value is at least as extreme and will stay in window longer
+            while candidates and sign*values[candidates[-1]] <= sign*value:
+                candidates.pop()
+            candidates.append(i)
+            if candidates[0] <= i - window:
+                candidates.popleft()
+            window_extremes[i] = values[candidates[0]]
+
+        return(window_extremes)
+
+    def summarize(self, account='bank', window=30):
+        """ Grab all rolling statistics for an account over a window size.
+
+        Parameters
+        ---
+        account : str
+            Prefix of account, one of 'cheq', 'save', or 'bank'.
+        window : int
+            Number of days in window.
+
+        Returns
+        ---
+        rolling_stats : dict of str to list
+            Days, and for the window ending on each day the mean balance,
+            volatility (standard deviation of daily changes), minimum and
+            maximum balance, drawdown (balance below window maximum), and
+            net flow (sum of daily changes).
+
+        """
+        days = getattr(self.banking_history, account + '_days')
+        changes = getattr(self.banking_history, account + '_daily_changes')
+        balances = getattr(self.banking_history, account + '_daily_balances')
+
+        max_balances = self.rolling_extreme(balances, window, use_max=True)
+        rolling_stats = {
+            'days': list(days),
+            'mean_balance': self.rolling_mean(balances, window),
+            'volatility': np.sqrt(self.rolling_variance(changes, window)),
+            'min_balance': self.rolling_extreme(balances, window,
+                                                use_max=False),
+            'max_balance': max_balances,
+            'drawdown': np.array(balances) - max_balances,
+            'net_flow': self.rolling_sum(changes, window),
+        }
+        for stat in rolling_stats:
+            if stat != 'days':
+                rolling_stats[stat] = [
+                    round(value, 2) for value in rolling_stats[stat]]
+
+        return(rolling_stats)
+
+
+class SummaryService():
+    """ Local HTTP/JSON service giving banking history balances, monthly
+    rollups, and pdf reports, for dashboards to share rather than each
+    recomputing them.
+
+    Listens on localhost only. Banking histories are calculated in a
+    process pool, concurrent identical requests wait on a single
+    calculation, and results are kept in an LRU cache keyed by a hash of the
+    request and the size and modification time of its csvs. Requests are
+    POSTed (or GET with query parameters) with initial_chequing,
+    initial_saving, chequing_csv, saving_csv, and optionally start_date and
+    end_date as month/day/year, and pdf_dir for reports. Latency of each
+    endpoint is given by GET /metrics.
+
+    Attributes
+    ---
+    port : int
+        Port listened on.
+    max_workers : int or None
+        Number of processes in pool, number of cpus if None.
+    cache_size : int
+        Number of results kept in cache.
+    result_cache : collections.OrderedDict
+        Results by cache key, from least to most recently used.
+    pending_results : dict of str to asyncio.Future
+        Results being calculated by cache key.
+    endpoint_metrics : dict of str to dict
+        Request, cache hit, coalesced, and error counts, and latency sketch
+        of each endpoint.
+
+    """
+    host = '127.0.0.1'
+
+    def __init__(self, port=8765, max_workers=None, cache_size=128):
+        """ Sets up service without starting it.
+
+        Parameters
+        ---
+        port : int
+            Port to listen on.
+        max_workers : int or None
+            Number of processes in pool, number of cpus if None.
+        cache_size : int
+            Number of results to keep in cache.
+
+        """
+        self.port = port
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.result_cache = OrderedDict()
+        self.pending_results = {}
+        self.endpoints = {
+            '/balance': SummaryService.compute_balances,
+            '/rollup': SummaryService.compute_rollups,
+            '/report': SummaryService.compute_report,
+        }
+        self.endpoint_metrics = {
+            endpoint: {'requests': 0, 'cache_hits': 0, 'coalesced': 0,
+                       'errors': 0, 'latency_ms': QuantileSketch()}
+            for endpoint in list(self.endpoints) + ['/metrics']
+        }
+
+    def serve_forever(self):
+        """ Runs service until interrupted. """
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        """ Starts process pool and server, serving until cancelled. """
+        # Spawn rather than fork workers, as forked workers would inherit
+        # open client connections and hold them open after responding
+        with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')) as executor:
+            self.executor = executor
+            server = await asyncio.start_server(self.handle_connection,
+                                                self.host, self.port)
+            async with server:
+                await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        """ Reads a single HTTP request from connection and writes its JSON
+        response, recording latency of endpoint requested.
+
+        """
+        start_time = time.perf_counter()
+        endpoint = None
+        try:
+            request_line = (await reader.readline()).decode().split()
+            headers = {}
+            while True:
+                header_line = (await reader.readline()).decode().strip()
+                if not header_line:
+                    break
+                name, _, value = header_line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(
+                int(headers.get('content-length', 0)))
+
+            method, target = request_line[0], request_line[1]
+            url = urlsplit(target)
+            endpoint = url.path
+            if endpoint == '/metrics' and method == 'GET':
+                status, response = 200, self.get_metrics()
+            elif endpoint not in self.endpoints:
+                status, response = 404, {'error': 'Unknown endpoint.'}
+            else:
+                params = dict(parse_qsl(url.query))
+                if method == 'POST' and body:
+                    params.update(json.loads(body))
+                status, response = 200, await self.get_result(endpoint,
+                                                              params)
+        except (IndexError, ValueError, KeyError, TypeError,
+                FileNotFoundError) as error:
+            status, response = 400, {'error': str(error)}
+        except Exception as error:
+            status, response = 500, {'error': str(error)}
+
+        response_body = json.dumps(response).encode()
+        writer.write(
+            ('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+             'Content-Length: {}\r\nConnection: close\r\n\r\n').format(
+                 status, 'OK' if status == 200 else 'Error',
+                 len(response_body)).encode() + response_body)
+        await writer.drain()
+        writer.close()
+
+        if endpoint in self.endpoint_metrics:
+            metrics = self.endpoint_metrics[endpoint]
+            metrics['requests'] += 1
+            metrics['errors'] += status != 200
+            metrics['latency_ms'].update(
+                [(time.perf_counter() - start_time)*1000])
+
+    async def get_result(self, endpoint, params):
+        """ Grab result of endpoint for parameters from cache, from a
+        calculation already running for them, or by calculating it in the
+        process pool.
+
+        Parameters
+        ---
+        endpoint : str
+            Path of endpoint requested.
+        params : dict
+            Parameters of request.
+
+        Returns
+        ---
+        result : dict
+            JSON serializable result of endpoint.
+
+        """
+        metrics = self.endpoint_metrics[endpoint]
+        cache_key = self.get_cache_key(endpoint, params)
+
+        # Reports are files that may be deleted after being written, so
+        # cached paths are only served while the file is still there
+        cached_result = self.result_cache.get(cache_key)
+        if (cached_result is not None and 'pdf_path' in cached_result and
+                not os.path.isfile(cached_result['pdf_path'])):
+            del self.result_cache[cache_key]
+
+        if cache_key in self.result_cache:
+            metrics['cache_hits'] += 1
+            self.result_cache.move_to_end(cache_key)
+            return(self.result_cache[cache_key])
+
+        if cache_key in self.pending_results:
+            metrics['coalesced'] += 1
+            return(await asyncio.shield(self.pending_results[cache_key]))
+
+        pending_result = asyncio.get_running_loop().run_in_executor(
+            self.executor, self.endpoints[endpoint], params)
+        self.pending_results[cache_key] = pending_result
+        try:
+            result = await pending_result
+        finally:
+            del self.pending_results[cache_key]
+
+        self.result_cache[cache_key] = result
+        if len(self.result_cache) > self.cache_size:
+            self.result_cache.popitem(last=False)
+
+        return(result)
+
+    def get_cache_key(self, endpoint, params):
+        """ Hash endpoint and parameters of request, along with size and
+        modification time of csvs so edited csvs are recalculated.
+
+        Parameters
+        ---
+        endpoint : str
+            Path of endpoint requested.
+        params : dict
+            Parameters of request.
+
+        Returns
+        ---
+        cache_key : str
+            Hex digest of request.
+
+        """
+        csv_stats = []
+        for csv_param in ('chequing_csv', 'saving_csv'):
+            csv_stat = os.stat(params[csv_param])
+            csv_stats.append((csv_stat.st_size, csv_stat.st_mtime_ns))
+
+        return(hashlib.sha256(json.dumps(
+            [endpoint, params, csv_stats], sort_keys=True).encode()
+            ).hexdigest())
+
+    def get_metrics(self):
+        """ Counts and latency percentiles of each endpoint.
+
+        Returns
+        ---
+        metrics : dict of str to dict
+            Request, cache hit, coalesced, and error counts, and median,
+            95th and 99th percentile, and maximum latency in milliseconds,
+            for each endpoint.
+
+        """
+        metrics = {}
+        for endpoint, endpoint_metrics in self.endpoint_metrics.items():
+            latency_sketch = endpoint_metrics['latency_ms']
+            metrics[endpoint] = {
+                name: value for name, value in endpoint_metrics.items()
+                if name != 'latency_ms'}
+            if latency_sketch.count:
+                metrics[endpoint].update({
+                    'p50_ms': latency_sketch.get_quantile(.5),
+                    'p95_ms': latency_sketch.get_quantile(.95),
+                    'p99_ms': latency_sketch.get_quantile(.99),
+                    'max_ms': latency_sketch.max_value,
+                })
+
+        return(metrics)
+
+    @staticmethod
+    def load_banking_history(params):
+        """ Calculate banking history from request parameters. """
+        date_window = {
+            date_param: datetime.datetime.strptime(params[date_param],
+                                                   "%m/%d/%Y")
+            for date_param in ('start_date', 'end_date')
+            if params.get(date_param)
+        }
+
+        return(BankingHistory(
+            float(params['initial_chequing']),
+            float(params['initial_saving']),
+            params['chequing_csv'], params['saving_csv'], **date_window))
+
+    @staticmethod
+    def compute_balances(params):
+        """ First and last day and balance of each account. """
+        banking_hist = SummaryService.load_banking_history(params)
+        balances = {}
+        for account in ('cheq', 'save', 'bank'):
+            series = getattr(banking_hist, account + '_series')
+            balances[account] = {
+                'first_day': series.first_day.strftime('%Y-%m-%d'),
+                'last_day': series.last_day.strftime('%Y-%m-%d'),
+                'initial_balance': series.get_first_balance(),
+                'final_balance': series.get_final_balance(),
+            }
+
+        return(balances)
+
+    @staticmethod
+    def compute_rollups(params):
+        """ Monthly changes, initial balances, and flows excluding
+        transfers, of each account.
+
+        """
+        banking_hist = SummaryService.load_banking_history(params)
+        rollups = {}
+        for account in ('cheq', 'save', 'bank'):
+            months, inflows, outflows = banking_hist.get_monthly_flows(
+                account)
+            rollups[account] = {
+                'months': [month.strftime('%Y-%m') for month in months],
+                'changes': [float(change) for change in getattr(
+                    banking_hist, account + '_monthly_changes')],
+                'initial_balances': [float(balance) for balance in getattr(
+                    banking_hist, account + '_initial_monthly_balances')],
+                'inflows': inflows,
+                'outflows': outflows,
+            }
+
+        return(rollups)
+
+    @staticmethod
+    def compute_report(params):
+        """ Generate pdf summary into pdf_dir, giving its path. """
+        if not os.path.isdir(params['pdf_dir']):
+            raise ValueError('Directory to save pdf to must exist.')
+        banking_hist = SummaryService.load_banking_history(params)
+
+        return({'pdf_path': banking_hist.plot_pdf(params['pdf_dir'])})
 
 
 class InitialInformationApp():
@@ -627,10 +2177,34 @@ class InitialInformationApp():
             column=0, row=8, padx=self.padx, pady=self.pady, sticky='NSWE',
             columnspan=2)
 
+        # Preview summary charts, embedded to the right of entries
+        ttk.Button(self.parent, text='Preview Financial Summary',
+                   command=self.previewsummary).grid(
+            column=0, row=9, padx=self.padx, pady=self.pady, sticky='NSWE',
+            columnspan=2)
+
+        self.previewfig = Figure(figsize=(6, 5))
+        self.previewcanvas = FigureCanvasTkAgg(self.previewfig,
+                                               master=self.parent)
+        self.previewcanvas.get_tk_widget().grid(
+            column=2, row=0, padx=self.padx, pady=self.pady, sticky='NSWE',
+            rowspan=10)
+        self.previewcanvas.mpl_connect('draw_event',
+                                       self.cachepreviewbackground)
+
+        # Banking history and csvs previewed (with size and modification
+        # time), so that only balances need to be shifted when the csvs are
+        # unchanged
+        self.previewhist = None
+        self.previewcsvs = None
+        self.previewdrawncsvs = None
+        self.previewbackground = None
+        self.previewartists = []
+
         for i in range(2):
             self.parent.grid_columnconfigure(i, uniform=True)
 
-        for i in range(9):
+        for i in range(10):
             self.parent.grid_rowconfigure(i, uniform=True)
 
         # Fill previous valid entry if history txt file exists
@@ -677,6 +2251,184 @@ class InitialInformationApp():
         """ Checks that entries are valid, destorying window to begin
         generation if are, and opening error message if not.
 
+        """
+        (cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid,
+         pdfdirvalid) = self.getentryvalidity()
+
+        # Check if all are valid, activating error box if not, and actiate
+        # case generation if is.
+        if (cheqbalvalid and savebalvalid and cheqcsvvalid and
+            savecsvvalid and pdfdirvalid):
+
+                self.cheqbal = float(self.cheqbalentry.get())
+                self.savebal = float(self.savebalentry.get())
+                self.cheqcsv = self.cheqcsventry.get()
+                self.savecsv = self.savecsventry.get()
+                self.pdfdir = self.pdfentry.get()
+
+                # Write out txt of entries for future uses if app
+                f = open('FinancialViewerPrevEntry.txt', 'w')
+                f.write('{}\n{}\n{}\n{}\n{}'.format(
+                    self.cheqbal, self.savebal, self.cheqcsv, self.savecsv,
+                    self.pdfdir))
+                f.close()
+
+                # Create banking history object containing data for plotting,
+                # reusing previewed history if generated from same csvs
+                banking_hist = self.getbankinghistory()
+
+                # Save plot to given path
+                banking_hist.plot_pdf(self.pdfdir)
+
+                # User feedback of successful plot generation
+                messagebox.showinfo('Success',
+                                    'Financial summary generated.')
+
+        else:
+            self.generateerrormessage(
+                cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid,
+                pdfdirvalid)
+
+    def previewsummary(self):
+        """ Previews summary charts in embedded canvas. If only balances
+        have changed since the last preview, shifts the previewed history and
+        redraws only the balance artists over a cached background.
+
+        """
+        (cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid,
+         pdfdirvalid) = self.getentryvalidity()
+
+        # Folder to save pdf to is not needed for preview
+        if not (cheqbalvalid and savebalvalid and cheqcsvvalid and
+                savecsvvalid):
+            self.generateerrormessage(
+                cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid)
+            return
+
+        self.cheqbal = float(self.cheqbalentry.get())
+        self.savebal = float(self.savebalentry.get())
+        self.cheqcsv = self.cheqcsventry.get()
+        self.savecsv = self.savecsventry.get()
+
+        # Only balance artists need updating if preview is already drawn
+        # from the same csvs
+        previewdrawn = self.previewdrawncsvs == self.getcsvstamps()
+        self.getbankinghistory()
+        if previewdrawn:
+            self.updatepreviewbalances()
+        else:
+            self.drawpreview()
+
+    def getbankinghistory(self):
+        """ Grab banking history for current balances and csvs, shifting
+        balances of previewed history if csvs are the same, and calculating
+        a new one if not.
+
+        """
+        csvstamps = self.getcsvstamps()
+        if self.previewhist is not None and self.previewcsvs == csvstamps:
+            self.previewhist.shift_initial_balances(self.cheqbal,
+                                                    self.savebal)
+        else:
+            self.previewhist = BankingHistory(
+                self.cheqbal, self.savebal, self.cheqcsv, self.savecsv)
+            self.previewcsvs = csvstamps
+
+        return(self.previewhist)
+
+    def getcsvstamps(self):
+        """ Grab path, size, and modification time of each csv entered, so
+        that csvs edited on disk are not treated as unchanged.
+
+        """
+        csvstamps = []
+        for csvpath in (self.cheqcsv, self.savecsv):
+            csvstat = os.stat(csvpath)
+            csvstamps.append((csvpath, csvstat.st_size, csvstat.st_mtime_ns))
+
+        return(tuple(csvstamps))
+
+    def drawpreview(self):
+        """ Rebuilds preview figure of monthly bank changes and balances.
+        Balance artists are animated, so are left out of the cached
+        background and drawn over it on each update.
+
+        """
+        hist = self.previewhist
+        self.previewfig.clear()
+        change_ax, self.previewbalax = self.previewfig.subplots(2, 1,
+                                                                sharex=True)
+
+        # Changes do not depend on initial balances so are part of background
+        changes = np.array(hist.bank_monthly_changes)
+        months = np.array(hist.bank_months)
+        for mask, color in ((changes > 0, Category20_20[4]),
+                            (changes < 0, Category20_20[6]),
+                            (changes == 0, Category20_20[0])):
+            change_ax.bar(months[mask], changes[mask], 12, color=color)
+        change_ax.set_ylabel('Total Bank Changes')
+
+        balance_bars = self.previewbalax.bar(
+            hist.bank_months, hist.bank_initial_monthly_balances, 12,
+            color=Category20_20[0], animated=True)
+        balance_line, = self.previewbalax.plot(
+            hist.bank_months, hist.bank_initial_monthly_balances, 'o-',
+            color=Category20_20[1], animated=True)
+        self.previewartists = list(balance_bars.patches) + [balance_line]
+        self.previewbalax.set_ylabel('Total Bank Balances')
+        self.previewbalax.set_xlabel('Date')
+        self.previewfig.autofmt_xdate()
+        self.previewdrawncsvs = self.previewcsvs
+
+        # Full draw triggers caching of background through draw_event
+        self.previewcanvas.draw()
+
+    def cachepreviewbackground(self, event=None):
+        """ Caches background of balance axes after a full draw, and draws
+        animated balance artists over it.
+
+        """
+        if not self.previewartists:
+            return
+        self.previewbackground = self.previewcanvas.copy_from_bbox(
+            self.previewbalax.bbox)
+        for artist in self.previewartists:
+            self.previewbalax.draw_artist(artist)
+        self.previewcanvas.blit(self.previewbalax.bbox)
+
+    def updatepreviewbalances(self):
+        """ Updates balance artists in place to shifted balances, blitting
+        them over the cached background. Falls back to a full draw if the
+        balances no longer fit within the axes limits.
+
+        """
+        balances = self.previewhist.bank_initial_monthly_balances
+        *balance_bars, balance_line = self.previewartists
+        for bar, balance in zip(balance_bars, balances):
+            bar.set_height(balance)
+        balance_line.set_ydata(balances)
+
+        ymin, ymax = self.previewbalax.get_ylim()
+        if min(balances + [0.]) < ymin or max(balances + [0.]) > ymax:
+            self.previewbalax.relim()
+            self.previewbalax.autoscale_view()
+            self.previewcanvas.draw()
+            return
+
+        self.previewcanvas.restore_region(self.previewbackground)
+        for artist in self.previewartists:
+            self.previewbalax.draw_artist(artist)
+        self.previewcanvas.blit(self.previewbalax.bbox)
+
+    def getentryvalidity(self):
+        """ Checks validity of each entry.
+
+        Returns
+        ---
+        entryvalidity : tuple of bool
+            Validity of chequing balance, saving balance, chequing csv,
+            saving csv, and pdf directory entries.
+
         """
         cheqbalvalid = False
         savebalvalid = False
@@ -713,39 +2465,8 @@ class InitialInformationApp():
         if os.path.isdir(self.pdfentry.get()):
             pdfdirvalid = True
 
-        # Check if all are valid, activating error box if not, and actiate
-        # case generation if is.
-        if (cheqbalvalid and savebalvalid and cheqcsvvalid and
-            savecsvvalid and pdfdirvalid):
-
-                self.cheqbal = float(self.cheqbalentry.get())
-                self.savebal = float(self.savebalentry.get())
-                self.cheqcsv = self.cheqcsventry.get()
-                self.savecsv = self.savecsventry.get()
-                self.pdfdir = self.pdfentry.get()
-
-                # Write out txt of entries for future uses if app
-                f = open('FinancialViewerPrevEntry.txt', 'w')
-                f.write('{}\n{}\n{}\n{}\n{}'.format(
-                    self.cheqbal, self.savebal, self.cheqcsv, self.savecsv,
-                    self.pdfdir))
-                f.close()
-
-                # Create banking history object containing data for plotting
-                banking_hist = BankingHistory(
-                    self.cheqbal, self.savebal, self.cheqcsv, self.savecsv)
-
-                # Save plot to given path
-                banking_hist.plot_pdf(self.pdfdir)
-
-                # User feedback of successful plot generation
-                messagebox.showinfo('Success',
-                                    'Financial summary generated.')
-
-        else:
-            self.generateerrormessage(
-                cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid,
-                pdfdirvalid)
+        return(cheqbalvalid, savebalvalid, cheqcsvvalid, savecsvvalid,
+               pdfdirvalid)
 
     def checkifnumber(self, test_string):
         """ Check if given string is convertable into a float number, meaning
@@ -784,6 +2505,14 @@ class InitialInformationApp():
         messagebox.showerror('Entry Error', error_message)
 
 if __name__ == '__main__':
+    # Run local summary service if asked, instead of GUI
+    if '--serve' in sys.argv:
+        port_index = sys.argv.index('--serve') + 1
+        SummaryService(
+            port=int(sys.argv[port_index]) if port_index < len(sys.argv)
+            else 8765).serve_forever()
+        sys.exit()
+
     # Initiate initial information entry GUI application and activate pdf
     # generation from there
     root = tk.Tk()